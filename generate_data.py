@@ -16,24 +16,41 @@ All distributions are calibrated to match the real dataset's known properties.
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import random
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import repeat
+import argparse
 import os
 
 SEED = 42
-np.random.seed(SEED)
-random.seed(SEED)
+rng  = np.random.default_rng(SEED)
 
 OUT = "/home/claude/ecommerce-funnel-retention/data"
 os.makedirs(OUT, exist_ok=True)
 
+# ── Sampling helpers ─────────────────────────────────────────────────────────
+def cdf(weights):
+    """Normalised cumulative distribution of weights, for draw_codes()."""
+    c = np.cumsum(weights, dtype=float)
+    return c / c[-1]
+
+def draw_codes(cum, n, rng=rng):
+    """n category codes sampled by inverting a precomputed cdf()."""
+    return np.searchsorted(cum, rng.random(n), side="right")
+
 # ── Constants matching real TheLook ──────────────────────────────────────────
-START_DATE = datetime(2023, 1, 1)
-END_DATE   = datetime(2024, 12, 31)
+START_DATE = np.datetime64("2023-01-01", "us")
+END_DATE   = np.datetime64("2024-12-31", "us")
 N_USERS    = 50_000
+EVENT_CHUNK_USERS = 10_000   # users per independently seeded events chunk
 
 TRAFFIC_SOURCES = ["Organic", "Search", "Email", "Facebook", "Display"]
 TRAFFIC_WEIGHTS = [0.30, 0.28, 0.18, 0.15, 0.09]
+TRAFFIC_CDF     = cdf(TRAFFIC_WEIGHTS)
 
 # Conversion multipliers per traffic source (relative to base rates)
 # Email and Organic are highest quality; Display and Facebook lowest
@@ -48,6 +65,8 @@ TRAFFIC_CONV_MULTIPLIER = {
 COUNTRIES = ["United States"] * 80 + ["United Kingdom"] * 8 + \
             ["Germany"] * 4 + ["France"] * 3 + ["Australia"] * 3 + \
             ["Canada"] * 2
+COUNTRY_NAMES, COUNTRY_COUNTS = np.unique(COUNTRIES, return_counts=True)
+COUNTRY_CDF = cdf(COUNTRY_COUNTS)
 US_STATES  = ["CA","TX","NY","FL","IL","PA","OH","GA","NC","MI",
                "NJ","VA","WA","AZ","MA","TN","IN","MO","MD","WI"]
 
@@ -67,81 +86,97 @@ CATEGORIES = {
     "Maternity":            0.03,
     "Sleep & Lounge":       0.04,
 }
+CATEGORY_NAMES = list(CATEGORIES)
+CATEGORY_CDF   = cdf(list(CATEGORIES.values()))
+# department lookup by category code
+IS_WOMENS      = np.isin(CATEGORY_NAMES, ["Dresses","Intimates","Maternity","Skirts","Swim"])
+
+BRANDS = ["Allegra K","Calvin Klein","Carhartt","Hanes","Volcom",
+          "Diesel","Dockers","Quiksilver","Nautica","Lucky Brand",
+          "G-Star Raw","Levi's","Free People","Vera Wang","Nike"]
+
+GENDERS    = ["M","F"]
+GENDER_CDF = cdf([0.46, 0.54])
 
 EVENT_TYPES = ["home", "category", "product", "cart", "purchase"]
 
 DEVICE_TYPES = ["mobile", "desktop", "tablet"]
 DEVICE_WEIGHTS = [0.52, 0.38, 0.10]
+DEVICE_CDF     = cdf(DEVICE_WEIGHTS)
 
 BROWSERS = ["Chrome","Safari","Firefox","IE","Other"]
 BROWSER_WEIGHTS = [0.50, 0.25, 0.12, 0.08, 0.05]
+BROWSER_CDF     = cdf(BROWSER_WEIGHTS)
 
 ORDER_STATUSES = ["Complete","Returned","Cancelled","Shipped","Processing"]
 # calibrated to real dataset: ~28% returned, ~5% cancelled etc
 STATUS_WEIGHTS = [0.57, 0.22, 0.05, 0.10, 0.06]
+STATUS_CDF     = cdf(STATUS_WEIGHTS)
+SHIPS          = np.isin(ORDER_STATUSES, ["Complete","Returned","Shipped"])   # by status code
+
+# num items per order: 1-4
+ITEMS_CDF = cdf([0.55, 0.28, 0.12, 0.05])
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 1. PRODUCTS
 # ─────────────────────────────────────────────────────────────────────────────
 def make_products(n=500):
-    cats = list(CATEGORIES.keys())
-    cat_probs = list(CATEGORIES.values())
-    brands = ["Allegra K","Calvin Klein","Carhartt","Hanes","Volcom",
-              "Diesel","Dockers","Quiksilver","Nautica","Lucky Brand",
-              "G-Star Raw","Levi's","Free People","Vera Wang","Nike"]
-
-    records = []
-    for i in range(1, n + 1):
-        cat = np.random.choice(cats, p=cat_probs)
-        brand = random.choice(brands)
-        base  = np.random.lognormal(mean=3.6, sigma=0.6)
-        retail_price = round(max(9.99, min(499.99, base)), 2)
-        cost         = round(retail_price * np.random.uniform(0.35, 0.60), 2)
-        records.append({
-            "product_id":           i,
-            "product_name":         f"{brand} {cat} #{i}",
-            "category":             cat,
-            "brand":                brand,
-            "retail_price":         retail_price,
-            "cost":                 cost,
-            "department":           "Women" if cat in ["Dresses","Intimates","Maternity","Skirts","Swim"] else "Men",
-        })
-    return pd.DataFrame(records)
+    product_id = np.arange(1, n + 1, dtype=np.int32)
+    cat    = draw_codes(CATEGORY_CDF, n)
+    brand  = rng.choice(len(BRANDS), size=n)
+    base   = rng.lognormal(mean=3.6, sigma=0.6, size=n)
+    retail_price = np.clip(base, 9.99, 499.99).round(2)
+    cost         = (retail_price * rng.uniform(0.35, 0.60, n)).round(2)
+    # "<brand> <category> #<id>", joined by Arrow kernels rather than per-row f-strings
+    product_name = pc.binary_join_element_wise(
+        pa.array(BRANDS).take(brand),
+        pa.array(CATEGORY_NAMES).take(cat),
+        pc.binary_join_element_wise("#", pc.cast(pa.array(product_id), pa.string()), ""),
+        " ",
+    )
+    return pd.DataFrame({
+        "product_id":           product_id,
+        "product_name":         pd.arrays.ArrowStringArray(product_name),
+        "category":             pd.Categorical.from_codes(cat, CATEGORY_NAMES),
+        "brand":                pd.Categorical.from_codes(brand, BRANDS),
+        "retail_price":         retail_price,
+        "cost":                 cost,
+        "department":           pd.Categorical.from_codes(IS_WOMENS[cat].astype(np.int8), ["Men","Women"]),
+    }, copy=False)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 2. USERS
 # ─────────────────────────────────────────────────────────────────────────────
-def rand_date(start, end):
-    delta = (end - start).total_seconds()
-    return start + timedelta(seconds=random.random() * delta)
+def rand_dates(start, end, n, rng=rng):
+    """n uniform timestamps (microsecond precision) between start and end."""
+    delta = (end - start).astype(np.int64)
+    return start + (rng.random(n) * delta).astype("timedelta64[us]")
 
 def make_users(n=N_USERS):
-    records = []
-    for i in range(1, n + 1):
-        country = random.choice(COUNTRIES)
-        state   = random.choice(US_STATES) if country == "United States" else None
-        traffic = np.random.choice(TRAFFIC_SOURCES, p=TRAFFIC_WEIGHTS)
-        age     = int(np.clip(np.random.normal(38, 13), 18, 70))
-        gender  = np.random.choice(["M","F"], p=[0.46, 0.54])
-        created = rand_date(START_DATE, END_DATE - timedelta(days=30))
-        records.append({
-            "user_id":        i,
-            "age":            age,
-            "gender":         gender,
-            "country":        country,
-            "state":          state,
-            "traffic_source": traffic,
-            "created_at":     created,
-        })
-    return pd.DataFrame(records)
+    country = draw_codes(COUNTRY_CDF, n)
+    # code -1 → missing state for non-US users
+    state   = np.where(COUNTRY_NAMES[country] == "United States", rng.integers(0, len(US_STATES), n), -1)
+    traffic = draw_codes(TRAFFIC_CDF, n)
+    age     = np.clip(rng.normal(38, 13, n), 18, 70).astype(np.int8)
+    gender  = draw_codes(GENDER_CDF, n)
+    created = rand_dates(START_DATE, END_DATE - np.timedelta64(30, "D"), n)
+    return pd.DataFrame({
+        "user_id":        np.arange(1, n + 1, dtype=np.int32),
+        "age":            age,
+        "gender":         pd.Categorical.from_codes(gender, GENDERS),
+        "country":        pd.Categorical.from_codes(country, COUNTRY_NAMES),
+        "state":          pd.Categorical.from_codes(state, US_STATES),
+        "traffic_source": pd.Categorical.from_codes(traffic, TRAFFIC_SOURCES),
+        "created_at":     created,
+    }, copy=False)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 3. EVENTS  (web session funnel)
 # ─────────────────────────────────────────────────────────────────────────────
-def make_events(users_df, products_df):
+def simulate_sessions(users_df, pid_arr, rng):
     """
     Simulate user web sessions with realistic funnel drop-offs.
     Each user can have multiple sessions over their lifetime.
@@ -176,160 +211,247 @@ def make_events(users_df, products_df):
         "Display":  0.28,
     }
 
-    records = []
-    event_id  = 1
-    session_id = 1
-
-    for _, user in users_df.iterrows():
-        # More sessions for engaged users (Poisson mean 3.5)
-        # Sessions per user: most users visit 1-2 times (high bounce rate on first visit)
-        n_sessions = max(1, np.random.poisson(1.6))
-        user_start = user["created_at"]
-        user_end   = min(user_start + timedelta(days=365), END_DATE)
-        if user_start >= user_end:
-            user_end = user_start + timedelta(days=14)
-
-        traffic       = user["traffic_source"]
-        cart_to_pur_r = CART_TO_PURCHASE[traffic]
-
-        for _ in range(n_sessions):
-            session_start = rand_date(user_start, user_end)
-            device  = np.random.choice(DEVICE_TYPES, p=DEVICE_WEIGHTS)
-            browser = np.random.choice(BROWSERS, p=BROWSER_WEIGHTS)
-            t = session_start
-
-            def add_event(etype, uri, prod_id=None):
-                nonlocal event_id
-                records.append({
-                    "event_id":       event_id,
-                    "session_id":     session_id,
-                    "user_id":        user["user_id"],
-                    "event_type":     etype,
-                    "created_at":     t,
-                    "device_type":    device,
-                    "browser":        browser,
-                    "traffic_source": traffic,
-                    "uri":            uri,
-                    "product_id":     prod_id,
-                })
-                event_id += 1
-
-            # Stage 1: home (every session starts here)
-            add_event("home", "/home")
-
-            # 35% of sessions bounce immediately (realistic for e-commerce)
-            if random.random() < 0.35:
-                session_id += 1
-                continue
-
-            # Stage 2: category — uniform across sources
-            if random.random() < BASE_HOME_TO_CAT:
-                t += timedelta(seconds=random.randint(10, 90))
-                add_event("category", "/category")
-
-                # Stage 3: product view — uniform across sources
-                if random.random() < BASE_CAT_TO_PROD:
-                    t += timedelta(seconds=random.randint(15, 120))
-                    prod = products_df.sample(1).iloc[0]
-                    add_event("product", f"/product/{prod['product_id']}", int(prod["product_id"]))
-
-                    # Stage 4: add to cart — uniform across sources
-                    if random.random() < BASE_PROD_TO_CART:
-                        t += timedelta(seconds=random.randint(10, 60))
-                        add_event("cart", "/cart", int(prod["product_id"]))
-
-                        # Stage 5: purchase — VARIES by traffic source (intent signal)
-                        if random.random() < cart_to_pur_r:
-                            t += timedelta(seconds=random.randint(30, 300))
-                            add_event("purchase", "/purchase", int(prod["product_id"]))
-
-            session_id += 1
-
-    return pd.DataFrame(records)
+    n_users = len(users_df)
+
+    # Sessions per user: most users visit 1-2 times (high bounce rate on first visit)
+    n_sessions = rng.poisson(1.6, n_users).clip(min=1)
+    user_idx   = np.repeat(np.arange(n_users), n_sessions)
+    n_sess     = len(user_idx)
+
+    # Session window per user: up to a year after sign-up, capped at END_DATE
+    user_start = users_df["created_at"].to_numpy(dtype="datetime64[us]")
+    user_end   = np.minimum(user_start + np.timedelta64(365, "D"), END_DATE)
+    user_end   = np.where(user_start >= user_end, user_start + np.timedelta64(14, "D"), user_end)
+    session_start = rand_dates(user_start[user_idx], user_end[user_idx], n_sess, rng)
+
+    sources  = users_df["traffic_source"].cat.categories
+    traffic  = users_df["traffic_source"].cat.codes.to_numpy()[user_idx]
+    cart_rate = np.array([CART_TO_PURCHASE[s] for s in sources])[traffic]
+    device   = draw_codes(DEVICE_CDF, n_sess, rng)
+    browser  = draw_codes(BROWSER_CDF, n_sess, rng)
+
+    # Proceed decision for each transition after home; 35% of sessions bounce
+    # immediately (realistic for e-commerce). Only purchase varies by traffic source.
+    bounce   = rng.random(n_sess) < 0.35
+    to_cat   = rng.random(n_sess) < BASE_HOME_TO_CAT
+    to_prod  = rng.random(n_sess) < BASE_CAT_TO_PROD
+    to_cart  = rng.random(n_sess) < BASE_PROD_TO_CART
+    to_pur   = rng.random(n_sess) < cart_rate
+    # Number of stages reached: home plus every transition up to the first failure,
+    # computed arithmetically instead of walking the stages
+    depth = 1 + (~bounce & to_cat) * (1 + to_prod * (1 + to_cart * (1 + to_pur)))
+
+    # Seconds since session start at which each stage is reached
+    offsets = np.column_stack([
+        np.zeros(n_sess, dtype=np.int64),
+        rng.integers(10, 91, n_sess),
+        rng.integers(15, 121, n_sess),
+        rng.integers(10, 61, n_sess),
+        rng.integers(30, 301, n_sess),
+    ]).cumsum(axis=1)
+
+    # A single product is viewed per session and carried through cart/purchase
+    viewed  = depth >= 3
+    prod_id = np.zeros(n_sess, dtype=pid_arr.dtype)
+    prod_id[viewed] = pid_arr[rng.integers(0, len(pid_arr), viewed.sum())]
+
+    # Preallocate one row per event; session i owns rows first[i] .. first[i] + depth[i] - 1
+    n_events   = depth.sum()
+    first      = np.cumsum(depth) - depth
+    sess       = np.repeat(np.arange(n_sess, dtype=np.int32), depth)
+    stage      = np.empty(n_events, dtype=np.int8)
+    created_at = np.empty(n_events, dtype="datetime64[us]")
+    uri        = np.empty(n_events, dtype=object)
+    event_prod = np.zeros(n_events, dtype=np.int32)
+    no_prod    = np.ones(n_events, dtype=bool)
+
+    # Fill stage by stage: only sessions deep enough contribute a row
+    for k, etype in enumerate(EVENT_TYPES):
+        reached = depth > k
+        rows    = first[reached] + k
+        stage[rows]      = k
+        created_at[rows] = session_start[reached] + offsets[reached, k].astype("timedelta64[s]")
+        if etype == "product":
+            uri[rows] = np.char.add("/product/", prod_id[reached].astype(str))
+        else:
+            uri[rows] = f"/{etype}"
+        if k >= 2:
+            event_prod[rows] = prod_id[reached]
+            no_prod[rows]    = False
+
+    return pd.DataFrame({
+        "event_id":       np.arange(1, n_events + 1, dtype=np.int32),
+        "session_id":     sess + 1,
+        "user_id":        users_df["user_id"].to_numpy()[user_idx][sess],
+        "event_type":     pd.Categorical.from_codes(stage, EVENT_TYPES),
+        "created_at":     created_at,
+        "device_type":    pd.Categorical.from_codes(device[sess], DEVICE_TYPES),
+        "browser":        pd.Categorical.from_codes(browser[sess], BROWSERS),
+        "traffic_source": pd.Categorical.from_codes(traffic[sess], sources),
+        "uri":            uri,
+        "product_id":     pd.arrays.IntegerArray(event_prod, no_prod),
+    }, copy=False)
+
+
+def iter_events(users_df, products_df, workers=1):
+    """
+    Yield the events table in chunks of EVENT_CHUNK_USERS users, with
+    session and event ids numbered across chunks. Every chunk draws from
+    its own Generator spawned from SEED, so the output is identical
+    whether chunks run in-process or across workers.
+    """
+    chunks  = [users_df.iloc[i:i + EVENT_CHUNK_USERS] for i in range(0, len(users_df), EVENT_CHUNK_USERS)]
+    rngs    = [np.random.default_rng(s) for s in np.random.SeedSequence(SEED).spawn(len(chunks))]
+    pid_arr = products_df["product_id"].to_numpy()
+
+    with ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext() as ex:
+        parts = (ex.map if ex else map)(simulate_sessions, chunks, repeat(pid_arr), rngs)
+        # Ids restart at 1 in every chunk; shift them to be globally unique
+        n_sessions = n_events = 0
+        for part in parts:
+            part["session_id"] += n_sessions
+            part["event_id"]   += n_events
+            n_sessions = part["session_id"].iat[-1]
+            n_events  += len(part)
+            yield part
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 4. ORDERS + ORDER_ITEMS  (derived from purchase events)
 # ─────────────────────────────────────────────────────────────────────────────
 def make_orders(events_df, products_df):
-    purchases = events_df[events_df["event_type"] == "purchase"].copy()
-    purchases = purchases.sort_values("created_at")
-
-    orders      = []
-    order_items = []
-    order_id    = 1
-    item_id     = 1
-
-    for _, ev in purchases.iterrows():
-        created_at  = ev["created_at"]
-        status      = np.random.choice(ORDER_STATUSES, p=STATUS_WEIGHTS)
-        # num items per order: 1-4
-        n_items     = np.random.choice([1,2,3,4], p=[0.55,0.28,0.12,0.05])
-        prods       = products_df.sample(n_items)
-
-        total_sale_price = 0
-        for _, p in prods.iterrows():
-            sale_price = round(p["retail_price"] * np.random.uniform(0.85, 1.0), 2)
-            total_sale_price += sale_price
-            shipped_at  = created_at + timedelta(days=random.randint(1,4)) if status in ["Complete","Returned","Shipped"] else None
-            returned_at = shipped_at + timedelta(days=random.randint(3,14)) if status == "Returned" and shipped_at else None
-            order_items.append({
-                "order_item_id":  item_id,
-                "order_id":       order_id,
-                "user_id":        ev["user_id"],
-                "product_id":     int(p["product_id"]),
-                "status":         status,
-                "sale_price":     sale_price,
-                "created_at":     created_at,
-                "shipped_at":     shipped_at,
-                "returned_at":    returned_at,
-            })
-            item_id += 1
-
-        orders.append({
-            "order_id":        order_id,
-            "user_id":         ev["user_id"],
-            "status":          status,
-            "num_of_item":     n_items,
-            "total_sale_price":round(total_sale_price, 2),
-            "created_at":      created_at,
-            "traffic_source":  ev["traffic_source"],
-        })
-        order_id += 1
-
-    return pd.DataFrame(orders), pd.DataFrame(order_items)
+    # Gather only the columns orders need, in purchase-time order
+    purchases  = events_df[events_df["event_type"] == "purchase"]
+    by_time    = np.argsort(purchases["created_at"].to_numpy(), kind="stable")
+    created_at = purchases["created_at"].to_numpy()[by_time]
+    user_id    = purchases["user_id"].to_numpy()[by_time]
+    traffic    = purchases["traffic_source"].array.take(by_time)
+    n_orders   = len(purchases)
+
+    pid_arr    = products_df["product_id"].to_numpy()
+    retail_arr = products_df["retail_price"].to_numpy()
+
+    status  = draw_codes(STATUS_CDF, n_orders)
+    n_items = (1 + draw_codes(ITEMS_CDF, n_orders)).astype(np.int8)
+
+    # Expand orders into line items
+    item_order = np.repeat(np.arange(n_orders, dtype=np.int32), n_items)
+    n_total    = len(item_order)
+    prods      = rng.integers(0, len(pid_arr), n_total)
+    sale_price = (retail_arr[prods] * rng.uniform(0.85, 1.0, n_total)).round(2)
+    total_sale_price = np.bincount(item_order, weights=sale_price, minlength=n_orders).round(2)
+
+    item_created = created_at[item_order]
+    item_status  = status[item_order]
+    shipped  = SHIPS[item_status]
+    returned = item_status == ORDER_STATUSES.index("Returned")
+    nat = np.datetime64("NaT")
+    shipped_at  = np.where(shipped, item_created + rng.integers(1, 5, n_total).astype("timedelta64[D]"), nat)
+    returned_at = np.where(returned, shipped_at + rng.integers(3, 15, n_total).astype("timedelta64[D]"), nat)
+
+    orders = pd.DataFrame({
+        "order_id":        np.arange(1, n_orders + 1, dtype=np.int32),
+        "user_id":         user_id,
+        "status":          pd.Categorical.from_codes(status, ORDER_STATUSES),
+        "num_of_item":     n_items,
+        "total_sale_price":total_sale_price,
+        "created_at":      created_at,
+        "traffic_source":  traffic,
+    }, copy=False)
+    order_items = pd.DataFrame({
+        "order_item_id":  np.arange(1, n_total + 1, dtype=np.int32),
+        "order_id":       item_order + 1,
+        "user_id":        user_id[item_order],
+        "product_id":     pid_arr[prods],
+        "status":         pd.Categorical.from_codes(item_status, ORDER_STATUSES),
+        "sale_price":     sale_price,
+        "created_at":     item_created,
+        "shipped_at":     shipped_at,
+        "returned_at":    returned_at,
+    }, copy=False)
+    return orders, order_items
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# OUTPUT
+# ─────────────────────────────────────────────────────────────────────────────
+def open_writer(name, schema, fmt="csv"):
+    """Arrow's native (multi-threaded) incremental writer for OUT/<name>.<fmt>."""
+    if fmt == "parquet":
+        return pq.ParquetWriter(f"{OUT}/{name}.parquet", schema, compression="zstd")
+    return pacsv.CSVWriter(f"{OUT}/{name}.csv", schema)
+
+def write_table(df, name, fmt="csv"):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with open_writer(name, table.schema, fmt) as writer:
+        writer.write_table(table)
+
+def write_chunks(chunks, name, fmt="csv"):
+    """
+    Stream DataFrame chunks into a single OUT/<name>.<fmt> file, yielding
+    each chunk once written so callers can keep only what they need.
+    """
+    writer = None
+    try:
+        for df in chunks:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = open_writer(name, table.schema, fmt)
+            writer.write_table(table)
+            yield df
+    finally:
+        if writer is not None:
+            writer.close()
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # MAIN
 # ─────────────────────────────────────────────────────────────────────────────
-print("Generating products...")
-products = make_products(500)
-products.to_csv(f"{OUT}/products.csv", index=False)
-print(f"  → {len(products)} products")
-
-print("Generating users...")
-users = make_users(N_USERS)
-users.to_csv(f"{OUT}/users.csv", index=False)
-print(f"  → {len(users)} users")
-
-print("Generating events (web sessions)...")
-events = make_events(users, products)
-events.to_csv(f"{OUT}/events.csv", index=False)
-print(f"  → {len(events)} events")
-
-print("Generating orders & order_items...")
-orders, order_items = make_orders(events, products)
-orders.to_csv(f"{OUT}/orders.csv", index=False)
-order_items.to_csv(f"{OUT}/order_items.csv", index=False)
-print(f"  → {len(orders)} orders, {len(order_items)} order items")
-
-# Quick sanity check
-print("\n── Sanity Checks ──────────────────────────────")
-print(f"Unique users with sessions:   {events['user_id'].nunique()}")
-print(f"Unique users with purchases:  {events[events['event_type']=='purchase']['user_id'].nunique()}")
-print(f"Order status distribution:\n{orders['status'].value_counts(normalize=True).round(3)}")
-print(f"Avg order value: ${orders['total_sale_price'].mean():.2f}")
-print(f"Traffic source split:\n{orders['traffic_source'].value_counts(normalize=True).round(3)}")
-print(f"Events by type:\n{events['event_type'].value_counts()}")
-print("Done.")
+def main():
+    parser = argparse.ArgumentParser(description="Generate the synthetic TheLook dataset.")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help="output file format (notebooks/analysis.py reads csv)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes used to simulate event chunks (default: in-process)")
+    args = parser.parse_args()
+
+    print("Generating products...")
+    products = make_products(500)
+    write_table(products, "products", args.format)
+    print(f"  → {len(products)} products")
+
+    print("Generating users...")
+    users = make_users(N_USERS)
+    write_table(users, "users", args.format)
+    print(f"  → {len(users)} users")
+
+    print("Generating events (web sessions)...")
+    # Events go to disk chunk by chunk; only purchases and per-chunk counts are kept
+    purchases, type_counts, active_users = [], [], 0
+    for chunk in write_chunks(iter_events(users, products, args.workers), "events", args.format):
+        purchases.append(chunk[chunk["event_type"] == "purchase"])
+        type_counts.append(chunk["event_type"].value_counts())
+        active_users += chunk["user_id"].nunique()   # chunks partition users
+    purchases   = pd.concat(purchases, ignore_index=True)
+    type_counts = sum(type_counts).sort_values(ascending=False)
+    print(f"  → {type_counts.sum()} events")
+
+    print("Generating orders & order_items...")
+    orders, order_items = make_orders(purchases, products)
+    write_table(orders, "orders", args.format)
+    write_table(order_items, "order_items", args.format)
+    print(f"  → {len(orders)} orders, {len(order_items)} order items")
+
+    # Quick sanity check
+    print("\n── Sanity Checks ──────────────────────────────")
+    print(f"Unique users with sessions:   {active_users}")
+    print(f"Unique users with purchases:  {purchases['user_id'].nunique()}")
+    print(f"Order status distribution:\n{orders['status'].value_counts(normalize=True).round(3)}")
+    print(f"Avg order value: ${orders['total_sale_price'].mean():.2f}")
+    print(f"Traffic source split:\n{orders['traffic_source'].value_counts(normalize=True).round(3)}")
+    print(f"Events by type:\n{type_counts}")
+    print("Done.")
+
+
+if __name__ == "__main__":
+    main()